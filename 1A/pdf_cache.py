@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+PDF Text Extraction Cache
+Caches raw per-page PyMuPDF text dicts on disk so pipelines that parse the
+same PDFs (outline extraction, section ranking) pay the parse cost only once.
+"""
+
+import hashlib
+import os
+import pickle
+from typing import List, Optional
+
+import pymupdf
+
+CACHE_DIR = ".cache"
+
+def _cache_path(pdf_path: str, max_pages: Optional[int]) -> str:
+    """Cache file path keyed by PDF path, modification time and page cap"""
+    key = f"{pdf_path}:{os.path.getmtime(pdf_path)}:{max_pages}"
+    return os.path.join(CACHE_DIR, hashlib.md5(key.encode()).hexdigest() + ".pkl")
+
+def cached_pages(pdf_path: str, max_pages: Optional[int] = None) -> List[dict]:
+    """Return per-page text dicts for a PDF, reusing the disk cache when fresh.
+
+    Only the first max_pages pages are extracted and cached; pass None to
+    cache the whole document.
+    """
+    cache_path = _cache_path(pdf_path, max_pages)
+    if os.path.exists(cache_path):
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+
+    doc = pymupdf.open(pdf_path, filetype="pdf")
+    try:
+        page_count = len(doc) if max_pages is None else min(len(doc), max_pages)
+        pages = [doc[page_num].get_text("dict") for page_num in range(page_count)]
+    finally:
+        doc.close()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write-then-rename so parallel workers never read a partial cache file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(pages, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return pages
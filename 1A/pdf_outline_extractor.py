@@ -7,11 +7,18 @@ Extracts title and headings (H1, H2, H3) from PDF documents and outputs structur
 import os
 import json
 import re
+import functools
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-import pymupdf
+from pdf_cache import cached_pages
 
-@dataclass
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@dataclass(slots=True)
 class HeadingCandidate:
     text: str
     page_num: int
@@ -24,6 +31,7 @@ class HeadingCandidate:
 
 # Constants
 MAX_PAGES = 50
+BOLD_FLAG = 16  # PyMuPDF span flag bit for bold text
 HEADING_PATTERNS = [
     r'^[0-9]+\.\s+[A-Z][A-Za-z\s]+$',  # 1. Introduction
     r'^[0-9]+\.[0-9]+\s+[A-Z][A-Za-z\s]+$',  # 1.1 Overview
@@ -32,6 +40,19 @@ HEADING_PATTERNS = [
     r'^(Section|Chapter|Part)\s+[A-Z\d]+[:.\\s-]+.+$',  # Chapter Title
 ]
 
+# Compiled once at import so the hot scoring/classification loops reuse them;
+# a single alternation means one engine invocation per candidate
+_HEADING_ANY = re.compile('|'.join(f'(?:{pattern})' for pattern in HEADING_PATTERNS))
+_NUM_RE = re.compile(r'^(?P<n>[0-9]+\.(?:[0-9]+(?:\.[0-9]+)?)?)\s+')  # 1. / 1.1 / 1.1.1 prefixes
+_NUM_DEPTH_LEVELS = {0: "H1", 1: "H2", 2: "H3"}
+_H1_PREFIXES = ("chapter", "section", "part")  # compared against casefolded text
+# First characters any heading pattern can match: a digit or an uppercase letter
+_PATTERN_LEAD_CHARS = frozenset('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+def _norm(text: str) -> str:
+    """Lowercase and collapse whitespace without invoking the regex engine"""
+    return ' '.join(text.lower().split())
+
 def normalize_footer(text):
     """Normalize footer text for comparison"""
     text = re.sub(r'\d+', '', text)
@@ -52,20 +73,19 @@ def calculate_confidence(candidate: HeadingCandidate, avg_font_size: float) -> f
     # Bold text scoring
     if candidate.is_bold and candidate.font_size > avg_font_size * 1.1:
         score += 0.2
-    
-    # Pattern matching scoring
-    compiled_patterns = [re.compile(pattern) for pattern in HEADING_PATTERNS]
-    for pattern in compiled_patterns:
-        if pattern.match(candidate.text):
-            score += 0.4
-            break
-    
+
     # Case formatting scoring
-    if candidate.text.isupper() and len(candidate.text) > 3:
+    text = candidate.text
+    if text.isupper() and len(text) > 3:
         score += 0.2
-    elif candidate.text.istitle():
+    elif text.istitle():
         score += 0.1
-    
+
+    # Pattern matching last; skip the regex engine entirely when the first
+    # character already rules out every heading pattern
+    if text and text[0] in _PATTERN_LEAD_CHARS and _HEADING_ANY.match(text):
+        score += 0.4
+
     return min(score, 1.0)
 
 def extract_title(headings: List[HeadingCandidate], pdf_path: str) -> str:
@@ -93,64 +113,77 @@ def extract_title(headings: List[HeadingCandidate], pdf_path: str) -> str:
     if title_parts:
         return " ".join(title_parts)
     
-    # Fallback to highest confidence heading
-    sorted_by_confidence = sorted(headings, key=lambda x: -x.confidence)
-    return sorted_by_confidence[0].text if sorted_by_confidence else "Untitled Document"
+    # Fallback to highest confidence heading; O(N) max beats a full sort
+    return max(headings, key=lambda h: h.confidence).text if headings else "Untitled Document"
 
-def extract_candidates_from_pdf(doc) -> List[HeadingCandidate]:
-    """Extract heading candidates from PDF document"""
-    max_pages = min(len(doc), MAX_PAGES)
+_font_bold_cache: Dict[str, bool] = {}
+
+def _font_is_bold(font: str) -> bool:
+    """Memoized substring check; PDFs typically reuse only a handful of fonts"""
+    bold = _font_bold_cache.get(font)
+    if bold is None:
+        bold = "bold" in font.casefold()
+        _font_bold_cache[font] = bold
+    return bold
+
+def _emit_candidate(append, first_span: dict, parts: List[str], page_num: int) -> None:
+    """Build a HeadingCandidate from a run of same-size spans, if long enough"""
+    # Raw span lengths bound the stripped text length from above, so junk
+    # groups can skip the join entirely
+    if sum(len(p) for p in parts) <= 3:
+        return
+    text = "".join(parts).strip()
+    if len(text) > 3:
+        font = first_span["font"]
+        append(HeadingCandidate(
+            text=text,
+            page_num=page_num + 1,
+            font_size=first_span["size"],
+            font_name=font,
+            is_bold=(first_span["flags"] & BOLD_FLAG) != 0 or _font_is_bold(font),
+            position=(first_span["bbox"][0], first_span["bbox"][1])
+        ))
+
+def extract_candidates_from_pdf(pages: List[dict]) -> List[HeadingCandidate]:
+    """Extract heading candidates from cached per-page text dicts"""
+    max_pages = min(len(pages), MAX_PAGES)
     candidates = []
-    
+    append = candidates.append  # bind once; looked up per emitted group otherwise
+
     for page_num in range(max_pages):
-        page = doc[page_num]
-        footer_margin = page.rect.height * 0.90
-        text_dict = page.get_text("dict")
-        
-        for block in text_dict["blocks"]:
+        page_dict = pages[page_num]
+        # Cached pages are stored unclipped so other pipelines can reuse
+        # them; drop footer blocks here instead
+        footer_margin = page_dict["height"] * 0.90
+
+        for block in page_dict["blocks"]:
             if "lines" in block:
-                x0, y0, x1, y1 = block["bbox"]
-                if y1 > footer_margin:
+                if block["bbox"][3] > footer_margin:
                     continue
-                
+
                 for line in block["lines"]:
                     if not line["spans"]:
                         continue
-                    
-                    curr_group = []
+
+                    first_span = None
+                    parts = []
+                    size = None
                     for span in line["spans"]:
-                        if not curr_group or (span["size"] == curr_group[-1]["size"]):
-                            curr_group.append(span)
+                        if first_span is None:
+                            first_span = span
+                            size = span["size"]
+                            parts.append(span["text"])
+                        elif span["size"] == size:
+                            parts.append(span["text"])
                         else:
-                            if curr_group:
-                                text = "".join([s["text"] for s in curr_group]).strip()
-                                if text and len(text) > 3:
-                                    span1 = curr_group[0]
-                                    candidate = HeadingCandidate(
-                                        text=text,
-                                        page_num=page_num + 1,
-                                        font_size=span1["size"],
-                                        font_name=span1["font"],
-                                        is_bold="Bold" in span1["font"].lower() or span1["flags"] & 2**4,
-                                        position=(span1["bbox"][0], span1["bbox"][1])
-                                    )
-                                    candidates.append(candidate)
-                            curr_group = [span]
-                    
+                            _emit_candidate(append, first_span, parts, page_num)
+                            first_span = span
+                            size = span["size"]
+                            parts = [span["text"]]
+
                     # Process the last group
-                    if curr_group:
-                        text = "".join([s["text"] for s in curr_group]).strip()
-                        if text and len(text) > 3:
-                            span1 = curr_group[0]
-                            candidate = HeadingCandidate(
-                                text=text,
-                                page_num=page_num + 1,
-                                font_size=span1["size"],
-                                font_name=span1["font"],
-                                is_bold="Bold" in span1["font"].lower() or span1["flags"] & 2**4,
-                                position=(span1["bbox"][0], span1["bbox"][1])
-                            )
-                            candidates.append(candidate)
+                    if first_span is not None:
+                        _emit_candidate(append, first_span, parts, page_num)
     
     return candidates
 
@@ -160,11 +193,18 @@ def filter_and_score_candidates(candidates: List[HeadingCandidate]) -> List[Head
     font_sizes = [c.font_size for c in candidates]
     avg_font_size = sum(font_sizes) / len(font_sizes) if font_sizes else 11
     
-    # Remove duplicates
+    # Remove duplicates: exact (text, size, font) repeats are common across
+    # pages (headers, TOC), so kill those with a cheap set lookup before
+    # paying for text normalization
     unique_candidates = []
+    seen_exact = set()
     seen_texts = set()
     for candidate in candidates:
-        normalized = re.sub(r'\s+', ' ', candidate.text.lower().strip())
+        exact_key = (candidate.text, candidate.font_size, candidate.font_name)
+        if exact_key in seen_exact:
+            continue
+        seen_exact.add(exact_key)
+        normalized = _norm(candidate.text)
         if normalized not in seen_texts:
             seen_texts.add(normalized)
             unique_candidates.append(candidate)
@@ -188,39 +228,30 @@ def classify_headings_improved(headings: List[HeadingCandidate], title_text: str
         return []
     
     # Filter out title text from headings
+    normalized_title = _norm(title_text)
     filtered_headings = []
     for heading in headings:
-        # Normalize both texts for comparison
-        normalized_heading = re.sub(r'\s+', ' ', heading.text.lower().strip())
-        normalized_title = re.sub(r'\s+', ' ', title_text.lower().strip())
-        
-        if normalized_heading != normalized_title:
+        if _norm(heading.text) != normalized_title:
             filtered_headings.append(heading)
     
     if not filtered_headings:
         return []
     
-    # Sort by font size (descending), then by page and position
-    sorted_headings = sorted(filtered_headings, key=lambda x: (-x.font_size, x.page_num, x.position[1]))
-    
-    # Get unique font sizes
-    font_sizes = [h.font_size for h in sorted_headings]
-    unique_sizes = sorted(set(font_sizes), reverse=True)
-    
+    # Only the two largest unique font sizes matter for bucketing, so skip
+    # the full sort by size and derive them in one pass
+    unique_sizes = sorted({h.font_size for h in filtered_headings}, reverse=True)[:2]
+
     # Improved classification logic
-    for heading in sorted_headings:
+    for heading in filtered_headings:
         # Check for numbered patterns first
-        if re.match(r'^[0-9]+\.\s+', heading.text):  # 1. Pattern
-            heading.level = "H1"
-        elif re.match(r'^[0-9]+\.[0-9]+\s+', heading.text):  # 1.1 Pattern
-            heading.level = "H2"
-        elif re.match(r'^[0-9]+\.[0-9]+\.[0-9]+\s+', heading.text):  # 1.1.1 Pattern
-            heading.level = "H3"
+        num_match = _NUM_RE.match(heading.text)
+        if num_match:  # 1. / 1.1 / 1.1.1 patterns
+            heading.level = _NUM_DEPTH_LEVELS[num_match.group('n').rstrip('.').count('.')]
         else:
             # Use font size based classification
             if len(unique_sizes) == 1:
                 # If all headings have same font size, use content patterns
-                if heading.text.isupper() or re.match(r'^(Chapter|Section|Part)', heading.text, re.IGNORECASE):
+                if heading.text.isupper() or heading.text.casefold().startswith(_H1_PREFIXES):
                     heading.level = "H1"
                 else:
                     heading.level = "H2"
@@ -232,7 +263,7 @@ def classify_headings_improved(headings: List[HeadingCandidate], title_text: str
                 heading.level = "H3"
     
     # Sort by page number and position for final output
-    final_headings = sorted(sorted_headings, key=lambda x: (x.page_num, x.position[1]))
+    final_headings = sorted(filtered_headings, key=lambda x: (x.page_num, x.position[1]))
     return final_headings
 
 def process_pdf(pdf_path: str, output_dir: str) -> bool:
@@ -240,11 +271,12 @@ def process_pdf(pdf_path: str, output_dir: str) -> bool:
     try:
         print(f"Processing: {pdf_path}")
         
-        # Open PDF
-        doc = pymupdf.open(pdf_path)
-        
+        # Load page text, parsing the PDF only on a cache miss; cap at the
+        # pages the extractor actually reads
+        pages = cached_pages(pdf_path, max_pages=MAX_PAGES)
+
         # Extract candidates
-        candidates = extract_candidates_from_pdf(doc)
+        candidates = extract_candidates_from_pdf(pages)
         
         # Filter and score candidates
         scored_candidates = filter_and_score_candidates(candidates)
@@ -273,15 +305,18 @@ def process_pdf(pdf_path: str, output_dir: str) -> bool:
         pdf_basename = os.path.splitext(os.path.basename(pdf_path))[0]
         output_path = os.path.join(output_dir, f"{pdf_basename}.json")
         
-        # Write JSON output
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        # Write JSON output; orjson encodes from C in one shot when available
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
         
         print(f"Generated: {output_path}")
         print(f"Title: {title}")
         print(f"Found {len(outline)} headings")
-        
-        doc.close()
+
         return True
         
     except Exception as e:
@@ -301,23 +336,22 @@ def main():
         print(f"Input directory {input_dir} does not exist!")
         return
     
-    # Find all PDF files
-    pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith('.pdf')]
-    
-    if not pdf_files:
+    # Find all PDF files; scandir gives us paths without extra stat calls
+    with os.scandir(input_dir) as entries:
+        pdf_paths = [e.path for e in entries if e.is_file() and e.name.lower().endswith('.pdf')]
+
+    if not pdf_paths:
         print("No PDF files found in input directory!")
         return
-    
-    print(f"Found {len(pdf_files)} PDF files to process")
-    
-    # Process each PDF
-    successful = 0
-    for pdf_file in pdf_files:
-        pdf_path = os.path.join(input_dir, pdf_file)
-        if process_pdf(pdf_path, output_dir):
-            successful += 1
-    
-    print(f"\nProcessing complete! {successful}/{len(pdf_files)} files processed successfully.")
+
+    print(f"Found {len(pdf_paths)} PDF files to process")
+
+    # Process PDFs in parallel; each worker opens and closes its own document
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = list(executor.map(functools.partial(process_pdf, output_dir=output_dir), pdf_paths))
+    successful = sum(results)
+
+    print(f"\nProcessing complete! {successful}/{len(pdf_paths)} files processed successfully.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
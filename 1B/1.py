@@ -2,6 +2,11 @@ import os
 import sys
 import json
 from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from utils import extract_text_by_page, rank_sections, refine_subsections
 
 # -------------------- Configurable Parameters --------------------
@@ -82,8 +87,12 @@ output = {
 
 # -------------------- Save Output --------------------
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-with open(output_path, "w", encoding="utf-8") as f:
-    json.dump(output, f, indent=2)
+if orjson is not None:
+    with open(output_path, "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+else:
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
 
 print(f"✅ Output saved to {output_path}")
 if missing_files: